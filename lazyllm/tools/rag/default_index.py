@@ -1,3 +1,4 @@
+import heapq
 from typing import List, Callable, Optional, Dict, Union, Tuple, Any
 from .doc_node import DocNode
 from .index_base import IndexBase
@@ -73,9 +74,11 @@ class DefaultIndex(IndexBase):
 
     def _filter_nodes_by_score(self, similarities: List[Tuple[DocNode, float]], topk: int,
                                similarity_cut_off: float, descend) -> List[DocNode]:
-        similarities.sort(key=lambda x: x[1], reverse=descend)
-        if topk is not None:
-            similarities = similarities[:topk]
+        if topk is None:
+            similarities = sorted(similarities, key=lambda x: x[1], reverse=descend)
+        else:
+            # partial selection keeps only topk candidates in the heap; same order as sorting then slicing
+            similarities = (heapq.nlargest if descend else heapq.nsmallest)(topk, similarities, key=lambda x: x[1])
 
         return [node.with_sim_score(score) for node, score in similarities if score > similarity_cut_off]
 
@@ -1,5 +1,4 @@
 import re
-import copy
 from ..base import ReaderParserBase
 from typing import List, Any, Dict
 from lazyllm.tools.rag.doc_node import DocNode
@@ -26,6 +25,79 @@ TYPE_CONFIG = {
     }
 }
 
+def _union(patterns: List[str], ignore_case: bool = False) -> re.Pattern:
+    # 将多个候选正则合并为一个分支正则，由 C 层的正则引擎一次扫描完成匹配
+    # 忽略大小写只作用于以英文字母开头的分支（如 Figure、Note），中文分支无需该标志
+    def group(p: str) -> str:
+        return f'(?i:{p})' if ignore_case and p[:1].isascii() and p[:1].isalpha() else f'(?:{p})'
+    return re.compile('|'.join(map(group, patterns)))
+
+
+def _keyword_union(keywords: List[str]) -> re.Pattern:
+    # 子串包含判断（keyword in text）合并为一次正则 search，等价于多模式匹配自动机
+    # 关键词按长度降序排列，match 时命中的是最长的关键词
+    return re.compile('|'.join(map(re.escape, sorted(keywords, key=len, reverse=True))))
+
+
+# 导入时一次性编译 TYPE_CONFIG 中的正则，避免每个节点都经过 re 模块的模式缓存查找
+COMPILED_TYPE_CONFIG = {
+    t: {
+        'pattern_union': _union(cfg['patterns'], ignore_case=True),
+        # 编号正则均以关键词开头，文本中不含任何关键词首字符（忽略大小写）时不可能命中
+        'first_chars': frozenset(c for k in cfg['content_keywords'] for c in (k[0].lower(), k[0].upper())),
+        # 开头命中的最长关键词决定前缀得分（查表得到）
+        'keyword_prefix': _keyword_union(cfg['content_keywords']),
+        'keyword_scores': {k: 2 * sum(k.startswith(c) for c in cfg['content_keywords'])
+                           for k in cfg['content_keywords']},
+        'style_exclude': _keyword_union(cfg['style_exclude']),
+        'style_keywords': _keyword_union(cfg['style_keywords']),
+    }
+    for t, cfg in TYPE_CONFIG.items()
+}
+
+# 脚注识别配置（不加 ^，允许在内容中匹配）
+# 只用于判断是否命中，冒号之后的空白不影响结果，省略后正则引擎在冒号处即可结束匹配
+_FOOTNOTE_START_RE = _union([
+    r'注\s*[：:]',  # 注：、注:
+    r'Note\s*[：:]',  # Note:、Note：
+    r'说明\s*[：:]',  # 说明：、说明:
+], ignore_case=True)
+_FOOTNOTE_MARKER_RE = _union([
+    r'[*★☆※]',  # 星号标记
+    r'[①②③④⑤⑥⑦⑧⑨⑩]',  # 圆圈数字
+    r'\[\d+\]',  # 方括号数字 [1]
+    r'\(\d+\)',  # 圆括号数字 (1)
+])
+# 脚注正则可能命中的首字符，文本中一个都不包含时跳过正则匹配
+_FOOTNOTE_FIRST_CHARS = frozenset('注Nn说*★☆※①②③④⑤⑥⑦⑧⑨⑩[(')
+_FOOTNOTE_STYLE_RE = _keyword_union(['footnote', '脚注', '尾注', 'note', '说明'])
+
+_MEDIA_TYPES = frozenset(('image', 'table', 'equation'))
+
+# reader 写入 metadata 的嵌套容器（docx 样式、pdf 版面信息），合并节点时需与原节点隔离
+_NESTED_METADATA_KEYS = ('style_dict', 'lines', 'bbox')
+
+
+def _caption_score(content: str, config: Dict[str, Any]) -> int:
+    # 每个作为开头的关键词加 2 分：文本开头的所有关键词互为前缀，都是最长命中关键词的前缀，因此可预先查表
+    score = 0
+    match = config['keyword_prefix'].match(content)
+    if match:
+        score += config['keyword_scores'][match.group()]
+    # 开头包含编号模式加 3 分，各编号模式互斥，合并后只需匹配一次
+    if config['pattern_union'].match(content):
+        score += 3
+    return score
+
+
+def _style_name(node: DocNode) -> str:
+    # 样式名称可能缺失或格式异常（如 docx 样式无名称时为 None），此时视为无样式
+    style_dict = node.metadata.get('style_dict')
+    if not isinstance(style_dict, dict):
+        return ''
+    style_name = style_dict.get('style_name')
+    return style_name.lower() if isinstance(style_name, str) else ''
+
 
 class CaptionFootnoteParser(ReaderParserBase):
     def __init__(self, save_image: bool = True, return_trace: bool = False, **kwargs):  # noqa: ARG002
@@ -43,19 +115,49 @@ class CaptionFootnoteParser(ReaderParserBase):
         if not nodes:
             return nodes
 
+        # 预先提取每个节点的类型，只有 image、table、equation 类型的节点需要处理
+        types = [n.metadata.get('type', '') for n in nodes]
+        media_indices = [i for i, t in enumerate(types) if t in _MEDIA_TYPES]
+        if not media_indices:
+            # 纯文本文档无需合并，只重新设置序号
+            for i, node in enumerate(nodes):
+                node.metadata['index'] = i
+            return list(nodes)
+
         # 第一遍：只检查节点，找出所有需要合并的节点关系
         # merge_info[i] = (caption_idx, footnote_idx)
         # 如果 merge_info[i] 存在，说明节点 i 需要合并 caption 和 footnote
         merge_info: Dict[int, tuple] = {}  # 存储合并信息 (caption_idx, footnote_idx)
-        merged_indices = set()  # 记录被合并的节点索引（caption 和 footnote）
-
-        for i, node in enumerate(nodes):
-            node_type = node.metadata.get('type', '')
-
-            # 只处理 image、table、equation 类型的节点
-            if node_type not in ['image', 'table', 'equation']:
-                continue
-
+        merged = bytearray(len(nodes))  # 标记被合并的节点（caption 和 footnote），按索引 O(1) 访问
+        # 预先提取去除首尾空白后的文本，避免对相邻节点重复 strip
+        texts = [n.text.strip() if n.text else '' for n in nodes]
+
+        # 同一个文本节点可能先后被相邻的两个媒体节点检查，缓存本次解析内的判断结果和样式名称
+        style_names: Dict[int, str] = {}
+        caption_cache: Dict[tuple, bool] = {}
+        footnote_cache: Dict[int, bool] = {}
+
+        def get_style_name(k: int) -> str:
+            if k not in style_names:
+                style_names[k] = _style_name(nodes[k])
+            return style_names[k]
+
+        def is_caption(k: int, target_type: str, config: Dict[str, Any]) -> bool:
+            key = (k, target_type)
+            hit = caption_cache.get(key)
+            if hit is None:
+                hit = caption_cache[key] = self._is_caption_text(texts[k], get_style_name(k), config)
+            return hit
+
+        def is_footnote(k: int) -> bool:
+            hit = footnote_cache.get(k)
+            if hit is None:
+                hit = footnote_cache[k] = self._is_footnote_text(texts[k], get_style_name(k))
+            return hit
+
+        for i in media_indices:
+            node_type = types[i]
+            config = COMPILED_TYPE_CONFIG[node_type]
             caption_idx = None
             footnote_idx = None
 
@@ -64,44 +166,22 @@ class CaptionFootnoteParser(ReaderParserBase):
             next_caption_idx = None
 
             if i > 0:
-                prev_node = nodes[i - 1]
-                if (prev_node.metadata.get('type') == 'text'
-                        and i - 1 not in merged_indices
-                        and self._is_caption(prev_node, node_type)):
+                if (types[i - 1] == 'text'
+                        and not merged[i - 1]
+                        and is_caption(i - 1, node_type, config)):
                     prev_caption_idx = i - 1
 
             if i + 1 < len(nodes):
-                next_node = nodes[i + 1]
-                if (next_node.metadata.get('type') == 'text'
-                        and i + 1 not in merged_indices
-                        and self._is_caption(next_node, node_type)):
+                if (types[i + 1] == 'text'
+                        and not merged[i + 1]
+                        and is_caption(i + 1, node_type, config)):
                     next_caption_idx = i + 1
 
             # 如果前后都有可能的 caption，选择更符合标准的（优先选择以'图'、'表'等开头的）
             if prev_caption_idx is not None and next_caption_idx is not None:
-                prev_node = nodes[prev_caption_idx]
-                next_node = nodes[next_caption_idx]
-                prev_content = prev_node.text.strip() if prev_node.text else ''
-                next_content = next_node.text.strip() if next_node.text else ''
-
                 # 检查哪个更符合 caption 标准（以'图'、'表'等开头，且包含编号）
-                config = TYPE_CONFIG.get(node_type, TYPE_CONFIG['table'])
-                prev_score = 0
-                next_score = 0
-
-                # 检查是否以关键词开头
-                for keyword in config['content_keywords']:
-                    if prev_content.startswith(keyword):
-                        prev_score += 2
-                    if next_content.startswith(keyword):
-                        next_score += 2
-
-                # 检查是否包含编号模式（在开头）
-                for pattern in config['patterns']:
-                    if re.match(pattern, prev_content, re.IGNORECASE):
-                        prev_score += 3
-                    if re.match(pattern, next_content, re.IGNORECASE):
-                        next_score += 3
+                prev_score = _caption_score(texts[prev_caption_idx], config)
+                next_score = _caption_score(texts[next_caption_idx], config)
 
                 # 选择得分更高的
                 caption_idx = prev_caption_idx if prev_score >= next_score else next_caption_idx
@@ -117,10 +197,9 @@ class CaptionFootnoteParser(ReaderParserBase):
                 check_start = caption_idx + 1
 
             if check_start < len(nodes):
-                check_node = nodes[check_start]
-                if (check_node.metadata.get('type') == 'text'
-                        and check_start not in merged_indices
-                        and self._is_footnote(check_node)):
+                if (types[check_start] == 'text'
+                        and not merged[check_start]
+                        and is_footnote(check_start)):
                     footnote_idx = check_start
 
             # 记录合并信息
@@ -129,15 +208,15 @@ class CaptionFootnoteParser(ReaderParserBase):
 
             # 标记被合并的节点
             if caption_idx is not None:
-                merged_indices.add(caption_idx)
+                merged[caption_idx] = 1
             if footnote_idx is not None:
-                merged_indices.add(footnote_idx)
+                merged[footnote_idx] = 1
 
         # 第二遍：进行合并，构建结果列表，并重新设置序号
         result = []
         for i, node in enumerate(nodes):
             # 如果节点已经被合并到其他节点中，跳过
-            if i in merged_indices:
+            if merged[i]:
                 continue
 
             # 如果是 image/table/equation 节点，需要合并 caption 和 footnote
@@ -169,30 +248,39 @@ class CaptionFootnoteParser(ReaderParserBase):
         '''
         if node.metadata.get('type') != 'text':
             return False
+        config = COMPILED_TYPE_CONFIG.get(target_type, COMPILED_TYPE_CONFIG['table'])
+        return self._is_caption_text(node.text.strip() if node.text else '', _style_name(node), config)
+
+    def _is_caption_text(self, content: str, style_name: str, config: Dict[str, Any]) -> bool:
+        '''
+        根据已提取的文本和样式名称判断是否为 caption，供 _parse_nodes 复用预先提取的结果
 
-        content = node.text.strip() if node.text else ''
+        Args:
+            content: 去除首尾空白后的节点文本
+            style_name: 小写的样式名称
+            config: 目标类型（image/table/equation）在 COMPILED_TYPE_CONFIG 中的配置
+
+        Returns:
+            bool: 是否为 caption
+        '''
         if not content:
             return False
 
-        config = TYPE_CONFIG.get(target_type, TYPE_CONFIG['table'])
-
         # 策略1: 检查样式名称（优先级最高，因为样式名称最可靠）
-        try:
-            style_name = node.metadata.get('style_dict', {}).get('style_name', '').lower()
-            # 先排除其他类型的特定关键词
-            if any(keyword in style_name for keyword in config['style_exclude']):
-                return False
-            # 检查是否包含对应的关键词
-            if any(keyword in style_name for keyword in config['style_keywords']):
-                return True
-        except Exception:
-            pass
+        # 先排除其他类型的特定关键词
+        if config['style_exclude'].search(style_name):
+            return False
+        # 检查是否包含对应的关键词
+        if config['style_keywords'].search(style_name):
+            return True
 
         # 策略2: 检查内容特征（包含'图'、'表'等关键词和数字编号）
+        # 先做首字符预过滤，绝大多数普通正文无需进入正则引擎
+        if config['first_chars'].isdisjoint(content):
+            return False
         # 使用 search 而不是 match，因为编号可能在内容中间（如'岩石耐磨指数表 表11.2-3'）
-        for pattern in config['patterns']:
-            if re.search(pattern, content, re.IGNORECASE):
-                return True
+        if config['pattern_union'].search(content):
+            return True
 
         return False
 
@@ -208,46 +296,39 @@ class CaptionFootnoteParser(ReaderParserBase):
         '''
         if node.metadata.get('type') != 'text':
             return False
+        return self._is_footnote_text(node.text.strip() if node.text else '', _style_name(node))
 
-        content = node.text.strip() if node.text else ''
+    def _is_footnote_text(self, content: str, style_name: str) -> bool:
+        '''
+        根据已提取的文本和样式名称判断是否为脚注，供 _parse_nodes 复用预先提取的结果
+
+        Args:
+            content: 去除首尾空白后的节点文本
+            style_name: 小写的样式名称
+
+        Returns:
+            bool: 是否为脚注
+        '''
         if not content:
             return False
 
-        # 定义脚注识别配置
-        footnote_config = {
-            'start_patterns': [
-                r'注\s*[：:]\s*',  # 注：、注:（移除 ^，允许在内容中匹配）
-                r'Note\s*[：:]\s*',  # Note:、Note：（移除 ^，允许在内容中匹配）
-                r'说明\s*[：:]\s*',  # 说明：、说明:（移除 ^，允许在内容中匹配）
-            ],
-            'marker_patterns': [
-                r'[*★☆※]',  # 星号标记（移除 ^，允许在内容中匹配）
-                r'[①②③④⑤⑥⑦⑧⑨⑩]',  # 圆圈数字（移除 ^，允许在内容中匹配）
-                r'\[\d+\]',  # 方括号数字 [1]（移除 ^，允许在内容中匹配）
-                r'\(\d+\)',  # 圆括号数字 (1)（移除 ^，允许在内容中匹配）
-            ],
-            'style_keywords': ['footnote', '脚注', '尾注', 'note', '说明']
-        }
-
         # 策略1: 检查样式名称（优先级最高，因为样式名称最可靠）
-        try:
-            style_name = node.metadata.get('style_dict', {}).get('style_name', '').lower()
-            if any(keyword in style_name for keyword in footnote_config['style_keywords']):
-                return True
-        except Exception:
-            pass
+        if _FOOTNOTE_STYLE_RE.search(style_name):
+            return True
+
+        # 首字符预过滤：不含任何脚注关键词或标记字符的文本直接排除
+        if _FOOTNOTE_FIRST_CHARS.isdisjoint(content):
+            return False
 
         # 策略2: 检查内容特征（包含'注'、'Note'等关键词）
         # 使用 search 而不是 match，因为标记可能在内容中间
-        for pattern in footnote_config['start_patterns']:
-            if re.search(pattern, content, re.IGNORECASE):
-                return True
+        if _FOOTNOTE_START_RE.search(content):
+            return True
 
         # 策略2补充: 检查脚注标记（如 *、①、[1] 等）
         # 使用 search 而不是 match，因为标记可能在内容中间
-        for pattern in footnote_config['marker_patterns']:
-            if re.search(pattern, content):
-                return True
+        if _FOOTNOTE_MARKER_RE.search(content):
+            return True
         return False
 
     def _merge_caption_footnote(self, node: DocNode, caption_node: DocNode = None,  # noqa: C901
@@ -273,8 +354,12 @@ class CaptionFootnoteParser(ReaderParserBase):
         if footnote_node:
             footnote_text = footnote_node.text.strip() if footnote_node.text else ''
 
-        # 构建新的 metadata
-        new_metadata = copy.deepcopy(node.metadata)
+        # 构建新的 metadata：顶层浅拷贝，仅对已知的嵌套容器单独复制，避免 deepcopy 的开销
+        new_metadata = dict(node.metadata)
+        for key in _NESTED_METADATA_KEYS:
+            value = new_metadata.get(key)
+            if isinstance(value, (dict, list)):
+                new_metadata[key] = value.copy()
 
         if caption_text:
             # 根据节点类型设置特定的 metadata
@@ -297,33 +382,22 @@ class CaptionFootnoteParser(ReaderParserBase):
             elif node_type == 'equation':
                 new_metadata['equation_footnote'] = footnote_text
 
-        # 构建新的文本内容
-        text_parts = []
-
+        # 构建新的文本内容：最多由 caption（或图片 markdown）、原始内容、footnote 三部分组成，空部分跳过
+        body_text = ''
         # 对于图片，只有在 save_image=True 时才构建 markdown 格式
         if node.metadata.get('type') == 'image':
             if self.save_image:
                 image_path = node.metadata.get('image_path', '')
-                if caption_text:
-                    text_parts.append(f'![{caption_text}]({image_path})')
-                else:
-                    text_parts.append(f'![]({image_path})')
-            # 如果 save_image=False，不添加图片 markdown，只添加 caption 和 footnote
-            elif caption_text:
-                text_parts.append(caption_text)
+                head_text = f'![{caption_text}]({image_path})'
+            else:
+                # 如果 save_image=False，不添加图片 markdown，只添加 caption 和 footnote
+                head_text = caption_text
         else:
-            # 对于表格和公式，先添加 caption
-            if caption_text:
-                text_parts.append(caption_text)
-            # 添加原始内容
-            if node.text:
-                text_parts.append(node.text)
-
-        # 添加 footnote
-        if footnote_text:
-            text_parts.append(footnote_text)
+            # 对于表格和公式，先添加 caption，再添加原始内容
+            head_text = caption_text
+            body_text = node.text or ''
 
-        new_text = '\n'.join(text_parts)
+        new_text = '\n'.join(filter(None, (head_text, body_text, footnote_text)))
 
         # 创建新的 DocNode
         merged_node = DocNode(
@@ -1,8 +1,8 @@
 from lazyllm.tools.rag.doc_node import DocNode
 from ..base import ReaderParserBase
-from typing import List, Any, Union
+from typing import List, Any
 import re
-import itertools
+from collections import defaultdict
 
 DOT = r"[\.．]"
 CN_NUM = r"[一二三四五六七八九十百千万零壹贰叁肆伍陆柒捌玖拾佰仟]"
@@ -43,6 +43,9 @@ TOC_PATTERNS = [
     # 3. 匹配书名号开头的目录行（通常是引用的标准或条文说明）+ 页码
     re.compile(r"^\s*《.*?》.*?\s+\d+\s*$")
 ]
+
+# 时间与目录正则合并为一个分支正则，过滤时只需一次匹配
+FILTER_PATTERN = re.compile("|".join(f"(?:{p.pattern})" for p in TIME_PATTERNS + TOC_PATTERNS))
 def _generate_normal_patterns_with_level() -> List[tuple[re.Pattern, int]]:
     patterns = []
     for template, level in NORMAL_TEMPLATES.items():
@@ -75,6 +78,16 @@ NUMBER_PATTERNS_WITH_LEVEL = _generate_number_patterns_with_level(max_level=4)
 NUMBER_PATTERNS = [p for p, _ in NUMBER_PATTERNS_WITH_LEVEL]
 LETTER_PATTERNS = _generate_letter_number_patterns()
 
+def _generate_level_union(patterns_with_level: List[tuple[re.Pattern, int]]) -> re.Pattern:
+    # 按原有顺序合并为带命名分组的分支正则，命中的分组名 L{level} 即为层级
+    return re.compile("|".join(f"(?P<L{level}>{pattern.pattern})" for pattern, level in patterns_with_level))
+
+NUMBER_UNION = _generate_level_union(NUMBER_PATTERNS_WITH_LEVEL)
+NORMAL_UNION = _generate_level_union(NORMAL_PATTERNS_WITH_LEVEL)
+
+_DOT_TAIL = re.compile(rf"{DOT}$")
+_DOT_SPLIT = re.compile(DOT)
+
 
 def _reset_node_index(nodes) -> List[DocNode]:
     result = []
@@ -83,21 +96,6 @@ def _reset_node_index(nodes) -> List[DocNode]:
         result.append(node)
     return result
 
-def _match(node: Union[DocNode, str], patterns: List) -> Union[re.Match, bool]:
-    if not patterns:
-        return False
-    for pattern in patterns:
-        if isinstance(node, DocNode):
-            match = re.match(pattern=pattern, string=node.text.strip())
-            if match:
-                return match
-        elif isinstance(node, str):
-            match = re.match(pattern=pattern, string=node.strip())
-            if match:
-                return match
-        else:
-            return False
-
 class LayoutNodeParser(ReaderParserBase):
     '''
     基于正则表达式对文档节点进行布局分析和层级识别。
@@ -119,16 +117,16 @@ class LayoutNodeParser(ReaderParserBase):
         4. 重置全局索引
         """
         result_nodes = []
-        # 确保按文件名排序，以便 groupby 正确工作
-        nodes = sorted(document, key=lambda x: x.metadata.get("file_name", ""))
+        # 按文件名分桶（保持原有相对顺序），只需对文件名排序，无需对全部节点排序
+        buckets = defaultdict(list)
+        for node in document:
+            buckets[node.metadata.get("file_name", "")].append(node)
 
-        for file_name, group in itertools.groupby(nodes, key=lambda x: x.metadata.get("file_name", "")):
-            grouped_nodes = list(group)
-            if not grouped_nodes:
-                continue
+        for file_name in sorted(buckets):
+            grouped_nodes = buckets[file_name]
 
             # 组内按原始索引排序，确保上下文顺序正确
-            grouped_nodes = sorted(grouped_nodes, key=lambda x: x.metadata.get("index", 0))
+            grouped_nodes.sort(key=lambda x: x.metadata.get("index", 0))
 
             # 解析并识别层级
             _parsed_nodes = self._parse_nodes(nodes=grouped_nodes, **kwargs)
@@ -161,7 +159,7 @@ class LayoutNodeParser(ReaderParserBase):
             # -------------------------------------------------------
             # 2.1 排除时间节点和目录行
             # 如果内容匹配时间正则或目录正则，强制降级为普通文本
-            if _match(node, TIME_PATTERNS + TOC_PATTERNS):
+            if FILTER_PATTERN.match(node.text.strip()):
                 node._metadata["text_level"] = 0
                 result.append(node)
                 continue
@@ -185,27 +183,28 @@ class LayoutNodeParser(ReaderParserBase):
             return 0
         text = text.strip()
 
-        # 针对包含换行符的多行文本，我们只匹配第一行
-        first_line = text.split('\n')[0].strip()
+        # 针对包含换行符的多行文本，我们只匹配第一行（只截取第一行，不切分全文）
+        nl = text.find('\n')
+        first_line = (text if nl < 0 else text[:nl]).strip()
 
         # 1. 尝试匹配明确的数字层级 (如 1. 1.1 1.1.1)
-        # 优先使用 NUMBER_PATTERNS_WITH_LEVEL 中的预定义层级
-        for pattern, level in NUMBER_PATTERNS_WITH_LEVEL:
-            if re.match(pattern, first_line):
-                return level
+        # 优先使用 NUMBER_PATTERNS_WITH_LEVEL 中的预定义层级，外层命名分组最后闭合，lastgroup 即命中的层级
+        match = NUMBER_UNION.match(first_line)
+        if match:
+            return int(match.lastgroup[1:])
 
         # 2. 尝试匹配字母序号 (如 A.1) -> 动态计算层级
         for pattern in LETTER_PATTERNS:
-            match = re.match(pattern, first_line)
+            match = pattern.match(first_line)
             if match:
                 index_str = match.group(1).strip()
-                index_str = re.sub(rf"{DOT}$", '', index_str)
-                segments = re.split(DOT, index_str)
+                index_str = _DOT_TAIL.sub('', index_str)
+                segments = _DOT_SPLIT.split(index_str)
                 return len([s for s in segments if s.strip()])
 
         # 3. 尝试匹配中文序号 (如 第一章) -> 使用定义的 Level
-        for pattern, level in NORMAL_PATTERNS_WITH_LEVEL:
-            if re.match(pattern, first_line):
-                return level
+        match = NORMAL_UNION.match(first_line)
+        if match:
+            return int(match.lastgroup[1:])
 
         return 0
@@ -0,0 +1,183 @@
+"""
+RAG应用使用的缓存
+1. CachedLLM：包装大语言模型调用，相同或近似的问题直接返回缓存的回答，省去一次LLM请求
+   - 精确缓存：(query, context_str)的blake2b摘要作为key，LRU淘汰
+   - 语义缓存：上下文相同且问题嵌入向量的cosine相似度超过阈值时，视为同一问题，与精确缓存共用同一个LRU
+2. CachedRetriever：包装检索器，相同问题（忽略首尾空白和大小写）直接返回上次的检索结果，
+   省去问题嵌入和HNSW检索
+3. PrefetchEmbedding：包装嵌入模型，一次批量请求预先取得一组问题的向量，检索和回答缓存对同一问题共用一次嵌入
+4. store_dir：按数据集、嵌入模型、索引配置和切分参数区分的持久化存储目录，重启后直接复用已切分、已嵌入的节点
+"""
+
+import hashlib
+import json
+import os
+import threading
+from collections import OrderedDict
+
+import lazyllm
+from lazyllm.thirdparty import numpy as np
+
+
+def _digest(*parts: str) -> bytes:
+    h = hashlib.blake2b(digest_size=16)
+    for part in parts:
+        h.update(part.encode("utf-8"))
+        h.update(b"\0")
+    return h.digest()
+
+
+def store_dir(root: str, *parts) -> str:
+    """
+    返回root下以parts摘要命名的存储目录，非字符串的part（索引配置、切分参数等）按排序键的JSON参与摘要
+    mapstore（SQLite）和chromastore本身会落盘，Document启动时存储非空即跳过解析和嵌入；
+    parts中任一项变化都会使用新目录，不会复用旧配置建立的集合和切片。未列入parts的变化（如切分函数的实现）不会被识别
+    """
+    parts = [part if isinstance(part, str) else json.dumps(part, sort_keys=True) for part in parts]
+    return os.path.join(root, _digest(*parts).hex())
+
+
+class CachedLLM(lazyllm.ModuleBase):
+    """
+    LLM调用结果缓存，调用方式与被包装的llm一致：cached_llm({"query": ..., "context_str": ...})
+    embed为None时只启用精确缓存；复用检索使用的嵌入模型，不额外加载模型
+    不修改被包装的llm，同一个llm在其他流程中的调用不受影响
+    """
+
+    def __init__(self, llm, embed=None, maxsize: int = 1024, threshold: float = 0.95):
+        super().__init__()
+        self._llm = llm
+        self._embed = embed
+        self._maxsize = maxsize
+        self._threshold = threshold
+        # key -> (context_key, query_vector, response)
+        self._cache = OrderedDict()
+        self._matrix = None
+        self._matrix_keys = []
+        self._lock = threading.RLock()
+
+    def forward(self, inputs: dict):
+        query = inputs.get("query", "")
+        context_key = _digest(inputs.get("context_str", ""))
+        key = _digest(query, inputs.get("context_str", ""))
+        with self._lock:
+            if key in self._cache:
+                self._cache.move_to_end(key)
+                return self._cache[key][2]
+
+        vector = self._embed_query(query)
+        if vector is not None:
+            response = self._semantic_lookup(vector, context_key)
+            if response is not None:
+                return response
+
+        response = self._llm(inputs)
+        with self._lock:
+            self._cache[key] = (context_key, vector, response)
+            if len(self._cache) > self._maxsize:
+                self._cache.popitem(last=False)
+            self._matrix = None
+        return response
+
+    def _embed_query(self, query: str):
+        if self._embed is None or not query:
+            return None
+        vector = np.asarray(self._embed(query), dtype=np.float32)
+        norm = np.linalg.norm(vector)
+        return vector / norm if norm else None
+
+    def _semantic_lookup(self, vector, context_key: bytes):
+        with self._lock:
+            if self._matrix is None:
+                # 缓存变化后重建向量矩阵，查询时一次矩阵乘法即完成内积检索
+                self._matrix_keys = [k for k, v in self._cache.items() if v[1] is not None]
+                if not self._matrix_keys:
+                    return None
+                self._matrix = np.stack([self._cache[k][1] for k in self._matrix_keys])
+            scores = self._matrix @ vector
+            for idx in np.argsort(-scores):
+                if scores[idx] < self._threshold:
+                    break
+                cached_context_key, _, response = self._cache[self._matrix_keys[idx]]
+                if cached_context_key == context_key:
+                    self._cache.move_to_end(self._matrix_keys[idx])
+                    return response
+        return None
+
+
+class CachedRetriever(lazyllm.ModuleBase):
+    """
+    检索结果的LRU缓存，调用方式与被包装的Retriever一致
+    继承ModuleBase，被包装的Retriever仍作为子模块随pipeline一起启动
+    """
+
+    def __init__(self, retriever, maxsize: int = 512):
+        super().__init__()
+        self._retriever = retriever
+        self._maxsize = maxsize
+        self._cache = OrderedDict()
+        self._lock = threading.RLock()
+
+    def forward(self, query: str, **kwargs):
+        if kwargs:
+            # 带过滤条件等额外参数的检索不缓存
+            return self._retriever(query, **kwargs)
+        query = query.strip()
+        key = query.lower()
+        with self._lock:
+            if key in self._cache:
+                self._cache.move_to_end(key)
+                return self._cache[key]
+        result = self._retriever(query)
+        with self._lock:
+            self._cache[key] = result
+            if len(self._cache) > self._maxsize:
+                self._cache.popitem(last=False)
+        return result
+
+
+class PrefetchEmbedding(lazyllm.ModuleBase):
+    """
+    问题向量缓存：prefetch一次批量请求多个问题的嵌入，之后检索这些问题时不再逐条请求
+    单条字符串的嵌入结果也按LRU缓存，检索器和CachedLLM对同一问题只请求一次嵌入
+    批量输入（文档切片入库）照常调用嵌入模型，不进入缓存
+    """
+
+    def __init__(self, embed, maxsize: int = 1024):
+        super().__init__()
+        self._embed = embed
+        self._maxsize = maxsize
+        self._cache = OrderedDict()
+        self._lock = threading.RLock()
+
+    @property
+    def batch_size(self):
+        # Document入库时按被包装模型的batch_size批量请求嵌入，包装后不能丢失
+        return getattr(self._embed, "batch_size", None)
+
+    def prefetch(self, queries):
+        queries = [q.strip() for q in queries]
+        with self._lock:
+            pending = [q for q in dict.fromkeys(queries) if q and q not in self._cache]
+        if not pending:
+            return
+        vectors = self._embed(pending)
+        with self._lock:
+            for query, vector in zip(pending, vectors):
+                self._cache[query] = vector
+            while len(self._cache) > self._maxsize:
+                self._cache.popitem(last=False)
+
+    def forward(self, input, **kwargs):
+        if not isinstance(input, str) or kwargs:
+            return self._embed(input, **kwargs)
+        with self._lock:
+            if input in self._cache:
+                self._cache.move_to_end(input)
+                return self._cache[input]
+        vector = self._embed(input)
+        with self._lock:
+            self._cache[input] = vector
+            if len(self._cache) > self._maxsize:
+                self._cache.popitem(last=False)
+        return vector
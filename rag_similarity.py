@@ -0,0 +1,74 @@
+"""
+RAG应用使用的相似度函数与向量预处理
+1. simsimd_cosine：导入本模块即完成注册，Retriever中通过similarity="simsimd_cosine"使用
+2. NormalizedEmbedding：入库前对嵌入向量做L2归一化，向量库可直接用内积（ip）代替cosine
+
+使用的lazyllm skill文档：
+1. assets/rag/retriever.md - 自定义相似度注册（register_similarity）
+"""
+
+from typing import List
+
+import lazyllm
+from lazyllm.thirdparty import numpy as np
+from lazyllm.tools.rag import register_similarity
+
+try:
+    import simsimd
+except ImportError:
+    simsimd = None
+
+
+def _as_float32(vectors) -> "np.ndarray":
+    """
+    转换为连续内存的float32数组，SimSIMD只有在这种布局下才会走SIMD内核
+    """
+    return np.ascontiguousarray(vectors, dtype=np.float32)
+
+
+@register_similarity(mode="embedding", batch=True)
+def simsimd_cosine(query: List[float], nodes: List[List[float]], **kwargs) -> List[float]:
+    """
+    批量计算查询向量与所有候选向量的cosine相似度
+    优先使用SimSIMD的cdist内核，未安装时退化为NumPy矩阵运算
+    """
+    if not nodes:
+        return []
+    query_vec = _as_float32(query)
+    node_vecs = _as_float32(nodes)
+    if simsimd is not None:
+        distances = np.asarray(simsimd.cdist(query_vec[None, :], node_vecs, metric="cosine"))[0]
+        scores = 1.0 - distances
+    else:
+        scores = node_vecs @ query_vec / (np.linalg.norm(node_vecs, axis=1) * np.linalg.norm(query_vec))
+    return scores.tolist()
+
+
+class NormalizedEmbedding(lazyllm.ModuleBase):
+    """
+    对嵌入模型的输出做L2归一化
+    归一化后cosine相似度等于内积，向量库可配置space="ip"，查询时省去两次求模
+    """
+
+    def __init__(self, embed):
+        super().__init__()
+        self._embed = embed
+
+    @property
+    def batch_size(self):
+        # Document入库时按被包装模型的batch_size批量请求嵌入，包装后不能丢失
+        return getattr(self._embed, "batch_size", None)
+
+    def forward(self, text, **kwargs):
+        res = self._embed(text, **kwargs)
+        if not isinstance(res, list) or not res:
+            # 稀疏向量等非稠密输出保持原样
+            return res
+        vectors = _as_float32(res)
+        if vectors.ndim == 1:
+            norm = np.linalg.norm(vectors)
+            # 零向量无法归一化，原样返回
+            return (vectors / norm).tolist() if norm else res
+        norms = np.sqrt(np.einsum("ij,ij->i", vectors, vectors))
+        norms[norms == 0] = 1.0
+        return (vectors / norms[:, None]).tolist()
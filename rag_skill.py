@@ -5,7 +5,7 @@ RAG应用实现
 1. mapstore作为segment_store存储后端
 2. chromastore作为vector_store存储后端  
 3. CharacterSplitter切分方法
-4. cosine相似度计算
+4. cosine相似度计算（由chromastore的HNSW内积索引完成，嵌入向量入库前已做L2归一化）
 
 使用的lazyllm skill文档：
 1. references/rag.md - RAG核心概念和完整流程
@@ -14,9 +14,15 @@ RAG应用实现
 4. assets/rag/retriever.md - cosine相似度配置
 """
 
+import functools
+import importlib.util
 import lazyllm
 import os
 
+import rag_similarity  # 嵌入向量L2归一化（NormalizedEmbedding）
+from rag_transform import MAX_CTX_CHARS, character_split, join_context, sentence_split
+from rag_cache import CachedLLM, CachedRetriever, PrefetchEmbedding, store_dir
+
 def create_rag_system():
     """
     创建完整的RAG系统
@@ -25,45 +31,66 @@ def create_rag_system():
     print("LazyLLM RAG应用启动")
     print("=" * 60)
     
-    # 1. 配置存储后端 - 参考assets/rag/store.md
+    # 1. 创建嵌入模型 - 参考assets/rag/retriever.md
+    try:
+        embed_model = lazyllm.OnlineEmbeddingModule(source="qwen")
+        embed_name = "qwen"
+        print("使用在线嵌入模型: sensenova")
+    except:
+        try:
+            embed_model = lazyllm.TrainableModule("bge-large-zh-v1.5")
+            if importlib.util.find_spec("infinity_emb"):
+                # Infinity部署时以bf16推理并用torch.compile编译模型，未安装时仍由transformers部署
+                embed_model.deploy_method(lazyllm.deploy.Infinity, dtype="bfloat16",
+                                          options_keys=["compile"], skip_check=True)
+            embed_model = embed_model.start()
+            embed_name = "bge-large-zh-v1.5"
+            print("使用本地嵌入模型: bge-large-zh-v1.5")
+        except:
+            print("警告: 使用默认嵌入模型")
+            embed_model = lazyllm.OnlineEmbeddingModule()
+            embed_name = "default"
+    embed_model = PrefetchEmbedding(rag_similarity.NormalizedEmbedding(embed_model))
+    
+    # 2. 配置存储后端 - 参考assets/rag/store.md
     # mapstore作为segment_store，chromastore作为vector_store
+    # 两者都会落盘，重启时复用同一数据集、嵌入模型、索引配置和切分参数对应的目录，跳过重新切分和嵌入
+    data_path = "/home/mnt/chenhao7/LazyWork/data/context"
+    index_kwargs = {
+        'hnsw': {
+            # 嵌入向量已做L2归一化，内积即cosine相似度
+            'space': 'ip',
+            'ef_construction': 200,
+            # topk=3且有0.3的相似度阈值，64的候选列表足够，查询时比默认的100少算约三分之一的距离
+            'ef_search': 64,
+        }
+    }
+    # 字符切分参数，第4步创建节点组时使用
+    chunk_kwargs = {'chunk_size': 500, 'step': 450}
+    node_groups = {
+        'character_chunks': ['character_split', chunk_kwargs],
+        'sentence_chunks': ['sentence_split'],
+    }
+    persist_dir = store_dir("/home/mnt/chenhao7/rag_store", data_path, embed_name, index_kwargs, node_groups)
     store_conf = {
         'segment_store': {
             'type': 'map',
             'kwargs': {
-                'uri': '/home/mnt/chenhao7/rag_segment_store',
+                'uri': os.path.join(persist_dir, 'segments.db'),
             },
         },
         'vector_store': {
             'type': 'chroma',
             'kwargs': {
-                'dir': '/home/mnt/chenhao7/rag_chroma_store',
-                'index_kwargs': {
-                    'hnsw': {
-                        'space': 'cosine',
-                        'ef_construction': 200,
-                    }
-                }
+                'dir': os.path.join(persist_dir, 'chroma'),
+                'index_kwargs': index_kwargs,
             },
         },
     }
     
     print("存储配置完成: mapstore + chromastore")
     
-    # 2. 创建嵌入模型 - 参考assets/rag/retriever.md
-    try:
-        embed_model = lazyllm.OnlineEmbeddingModule(source="qwen")
-        print("使用在线嵌入模型: sensenova")
-    except:
-        try:
-            embed_model = lazyllm.TrainableModule("bge-large-zh-v1.5").start()
-            print("使用本地嵌入模型: bge-large-zh-v1.5")
-        except:
-            print("警告: 使用默认嵌入模型")
-            embed_model = lazyllm.OnlineEmbeddingModule()
-    
     # 3. 创建Document对象，加载文档数据 - 参考references/rag.md
-    data_path = "/home/mnt/chenhao7/LazyWork/data/context"
     print(f"加载文档数据从: {data_path}")
     
     if not os.path.exists(data_path):
@@ -84,13 +111,13 @@ def create_rag_system():
     # 创建字符切分节点组
     documents.create_node_group(
         name='character_chunks',
-        transform=lambda text: [text[i:i+500] for i in range(0, len(text), 450)]
+        transform=functools.partial(character_split, **chunk_kwargs)
     )
     
     # 创建更细粒度的切分
     documents.create_node_group(
         name='sentence_chunks',
-        transform=lambda text: [sentence + '。' for sentence in text.split('。') if sentence.strip()]
+        transform=sentence_split
     )
     
     print("文档切分完成")
@@ -108,6 +135,9 @@ def create_rag_system():
         join=True
     )
     
+    # 相同问题直接复用上次的检索结果
+    retriever = CachedRetriever(retriever)
+    
     print("检索器创建完成")
     
     # 6. 创建大语言模型用于生成回答
@@ -140,11 +170,14 @@ def create_rag_system():
         extra_keys=['context_str']
     ))
     
+    # 相同或近似的问题直接复用缓存的回答，语义缓存复用检索的嵌入模型
+    llm = CachedLLM(llm, embed=embed_model)
+    
     print("大语言模型配置完成")
     
-    return retriever, llm
+    return retriever, llm, embed_model
 
-def interactive_qa(retriever, llm):
+def interactive_qa(retriever, llm, embed_model=None):
     """
     交互式问答循环
     """
@@ -163,6 +196,10 @@ def interactive_qa(retriever, llm):
     for i, query in enumerate(example_queries, 1):
         print(f"{i}. {query}")
     
+    # 一次批量请求预取示例查询的向量，输入示例查询时检索无需再逐条请求嵌入
+    if embed_model is not None:
+        embed_model.prefetch(example_queries)
+    
     print("\n" + "=" * 60)
     
     while True:
@@ -188,9 +225,10 @@ def interactive_qa(retriever, llm):
                 context = "未找到相关上下文信息。"
             else:
                 if isinstance(retrieved_nodes, list):
-                    context = "\n".join([str(node) for node in retrieved_nodes])
+                    context = join_context(str(node) for node in retrieved_nodes)
                 else:
-                    context = str(retrieved_nodes)
+                    # output_format='content'且join=True时检索器直接返回拼接好的字符串，同样按上限截断
+                    context = str(retrieved_nodes)[:MAX_CTX_CHARS]
                 
                 print(f"检索到相关文档片段")
             
@@ -217,8 +255,8 @@ def main():
     主函数：实现完整的RAG应用
     """
     try:
-        retriever, llm = create_rag_system()
-        interactive_qa(retriever, llm)
+        retriever, llm, embed_model = create_rag_system()
+        interactive_qa(retriever, llm, embed_model)
     except Exception as e:
         print(f"RAG应用启动失败: {e}")
         import traceback
@@ -0,0 +1,56 @@
+"""
+RAG应用使用的文档切分函数与上下文拼接
+1. character_split、sentence_split：供Document.create_node_group的transform参数使用
+2. join_context：把检索到的节点内容拼接为传给LLM的context_str
+
+使用的lazyllm skill文档：
+1. assets/rag/transform.md - 自定义切分函数配置方法
+"""
+
+import io
+from typing import Iterable, List
+
+# 传给LLM的上下文长度上限（字符数），超出的节点直接丢弃，避免服务端截断
+MAX_CTX_CHARS = 8000
+
+
+def character_split(text: str, chunk_size: int = 500, step: int = 450) -> List[str]:
+    """
+    按字符滑动窗口切分，相邻块之间重叠chunk_size - step个字符
+    剩余长度不超过重叠部分时，最后一个窗口已完全包含在前一块中，不再单独成块
+    """
+    if not text:
+        return []
+    end = min(max(len(text) - (chunk_size - step), 1), len(text))
+    return [text[i:i + chunk_size] for i in range(0, end, step)]
+
+
+def sentence_split(text: str) -> List[str]:
+    """
+    按句号切分为句子，每句末尾补回句号，跳过空白句
+    用isspace判断空白句，不为每个片段额外创建strip后的字符串
+    """
+    return [sentence + "。" for sentence in text.split("。") if sentence and not sentence.isspace()]
+
+
+def join_context(texts: Iterable[str], max_chars: int = MAX_CTX_CHARS) -> str:
+    """
+    用换行拼接节点内容，写入StringIO不生成中间列表
+    按节点整体截断：加入下一个节点会超过max_chars时停止；第一个节点本身超长时截取前max_chars个字符
+    """
+    buf = io.StringIO()
+    size = 0
+    first = True
+    for text in texts:
+        if first:
+            if len(text) > max_chars:
+                return text[:max_chars]
+            first = False
+        else:
+            if size + 1 + len(text) > max_chars:
+                break
+            buf.write("\n")
+            size += 1
+        buf.write(text)
+        size += len(text)
+    return buf.getvalue()
@@ -1,6 +1,11 @@
 import lazyllm
 import os
 from lazyllm import bind
+from lazyllm.thirdparty import jieba
+
+import rag_similarity  # noqa: F401  注册simsimd_cosine相似度
+from rag_cache import CachedLLM, CachedRetriever, PrefetchEmbedding
+from rag_transform import join_context
 
 # 配置DeepSeek API Key (需要设置环境变量)
 # export LAZYLLM_DEEPSEEK_API_KEY=your_api_key
@@ -14,20 +19,24 @@ class RAGApplication:
         """设置RAG系统"""
         # 1. 加载文档
         print("正在加载文档...")
+        self.embed = PrefetchEmbedding(lazyllm.OnlineEmbeddingModule(source="qwen"))  # 使用qwen嵌入模型
+        self.rerank_model = lazyllm.OnlineEmbeddingModule(type="rerank")  # 高级RAG的重排序模型，多次创建流程时共用
         self.documents = lazyllm.Document(
             dataset_path=self.docs_path,
-            embed=lazyllm.OnlineEmbeddingModule(source="qwen"),  # 使用qwen嵌入模型
+            embed=self.embed,
             manager=False
         )
         
         # 2. 创建检索器
         print("正在创建检索器...")
-        self.retriever = lazyllm.Retriever(
+        self.retriever = CachedRetriever(lazyllm.Retriever(
             doc=self.documents,
             group_name="CoarseChunk",
             similarity="bm25_chinese",  # 适合中文文档
             topk=5
-        )
+        ))
+        # bm25_chinese用jieba分词，启动时预加载词典，首次检索不再等待词典加载
+        jieba.initialize()
         
         # 3. 配置LLM (使用DeepSeek)
         print("正在配置DeepSeek模型...")
@@ -56,6 +65,9 @@ class RAGApplication:
             instruction=prompt,
             extra_keys=['context_str']
         ))
+        
+        # 5. 回答缓存：相同或近似的问题直接复用缓存的回答
+        self.cached_llm = CachedLLM(self.llm, embed=self.embed)
     
     def query(self, question):
         """查询方法"""
@@ -65,10 +77,10 @@ class RAGApplication:
         doc_nodes = self.retriever(query=question)
         
         # 2. 构建上下文
-        context_str = "\n".join([node.get_content() for node in doc_nodes])
+        context_str = join_context(node.get_content() for node in doc_nodes)
         
         # 3. 生成回答
-        result = self.llm({
+        result = self.cached_llm({
             "query": question,
             "context_str": context_str
         })
@@ -83,33 +95,33 @@ class RAGApplication:
         
         with pipeline() as ppl:
             with parallel().sum as ppl.prl:
-                # BM25检索
-                ppl.prl.bm25_retriever = lazyllm.Retriever(
+                # BM25检索（相同问题复用缓存的检索结果）
+                ppl.prl.bm25_retriever = CachedRetriever(lazyllm.Retriever(
                     doc=self.documents,
                     group_name="CoarseChunk",
                     similarity="bm25_chinese",
                     topk=3
-                )
+                ))
                 
                 # 向量检索
-                ppl.prl.vector_retriever = lazyllm.Retriever(
+                ppl.prl.vector_retriever = CachedRetriever(lazyllm.Retriever(
                     doc=self.documents,
                     group_name="CoarseChunk",
-                    similarity="cosine",
+                    similarity="simsimd_cosine",
                     topk=3
-                )
+                ))
             
             # 重排序
             ppl.reranker = lazyllm.Reranker(
                 name='ModuleReranker',
-                model=lazyllm.OnlineEmbeddingModule(type="rerank"),
+                model=self.rerank_model,
                 topk=3
             ) | bind(query=ppl.input)
             
             # 格式化输出
             ppl.formatter = (
                 lambda nodes, query: dict(
-                    context_str="\n".join([node.get_content() for node in nodes]),
+                    context_str="\n".join(node.get_content() for node in nodes),
                     query=query,
                 )
             ) | bind(query=ppl.input)
@@ -176,11 +188,15 @@ def demo_advanced_rag():
         "松平康忠是谁？"
     ]
     
-    for question in test_questions:
-        print(f"\n问题: {question}")
-        result = advanced_rag(question)
-        print(f"回答: {result}")
-        print("-" * 50)
+    # 一次批量请求预取所有测试问题的向量，向量检索时无需逐条请求嵌入
+    rag_app.embed.prefetch(test_questions)
+    
+    # 各问题相互独立，耗时主要在等待LLM的HTTP响应，并发执行；map保证按提问顺序输出
+    with lazyllm.ThreadPoolExecutor(max_workers=len(test_questions)) as executor:
+        for question, result in zip(test_questions, executor.map(advanced_rag, test_questions)):
+            print(f"\n问题: {question}")
+            print(f"回答: {result}")
+            print("-" * 50)
 
 if __name__ == "__main__":
     # 运行基础RAG应用
@@ -1,6 +1,97 @@
+import ast
+import functools
+import operator
+
 import lazyllm
 from lazyllm.tools import fc_register, ReactAgent
 
+try:
+    import ahocorasick
+except ImportError:
+    ahocorasick = None
+
+# 与原字符白名单一致：不接受1e400、0x10、1_000等写法
+_ALLOWED_CHARS = frozenset("0123456789+-*/(). ")
+# 乘方的底数和指数上限，避免9**9**9**9这类表达式长时间占用工具线程
+_MAX_POWER_BASE = 10 ** 6
+_MAX_POWER_EXPONENT = 100
+
+def _power(base, exponent):
+    if abs(base) > _MAX_POWER_BASE or abs(exponent) > _MAX_POWER_EXPONENT:
+        raise ValueError("乘方的底数或指数过大")
+    return operator.pow(base, exponent)
+
+# 计算器支持的运算符，表达式按语法树求值，不经过eval
+_BINARY_OPERATORS = {
+    ast.Add: operator.add,
+    ast.Sub: operator.sub,
+    ast.Mult: operator.mul,
+    ast.Div: operator.truediv,
+    ast.FloorDiv: operator.floordiv,
+    ast.Pow: _power,
+}
+_UNARY_OPERATORS = {
+    ast.UAdd: operator.pos,
+    ast.USub: operator.neg,
+}
+
+class UnsupportedExpression(ValueError):
+    pass
+
+def _eval_node(node):
+    if isinstance(node, ast.Constant) and type(node.value) in (int, float):
+        return node.value
+    if isinstance(node, ast.BinOp) and type(node.op) in _BINARY_OPERATORS:
+        return _BINARY_OPERATORS[type(node.op)](_eval_node(node.left), _eval_node(node.right))
+    if isinstance(node, ast.UnaryOp) and type(node.op) in _UNARY_OPERATORS:
+        return _UNARY_OPERATORS[type(node.op)](_eval_node(node.operand))
+    raise UnsupportedExpression(ast.dump(node))
+
+@functools.lru_cache(maxsize=256)
+def _evaluate(expression: str):
+    """
+    解析并计算算术表达式，结果按表达式缓存，重复的表达式无需再次解析
+    """
+    if not _ALLOWED_CHARS.issuperset(expression):
+        raise UnsupportedExpression(expression)
+    return _eval_node(ast.parse(expression.strip(), mode="eval").body)
+
+# 情感词表
+POSITIVE_WORDS = ["好", "棒", "优秀", "喜欢", "开心", "快乐", "满意"]
+NEGATIVE_WORDS = ["差", "坏", "糟糕", "讨厌", "难过", "失望", "不满"]
+
+def _build_sentiment_automaton():
+    """
+    用全部情感词构建Aho-Corasick自动机，一次线性扫描找出文本中出现的所有情感词（包括相互重叠的词）
+    """
+    if ahocorasick is None:
+        return None
+    automaton = ahocorasick.Automaton()
+    for word in POSITIVE_WORDS:
+        automaton.add_word(word, (word, 1))
+    for word in NEGATIVE_WORDS:
+        automaton.add_word(word, (word, -1))
+    automaton.make_automaton()
+    return automaton
+
+_SENTIMENT_AUTOMATON = _build_sentiment_automaton()
+
+def _count_sentiment_words(text: str):
+    """
+    统计文本中积极词和消极词的出现次数（重复出现按次数累计），未安装pyahocorasick时逐词用str.count统计
+    """
+    if _SENTIMENT_AUTOMATON is None:
+        positive_count = sum(text.count(word) for word in POSITIVE_WORDS)
+        negative_count = sum(text.count(word) for word in NEGATIVE_WORDS)
+        return positive_count, negative_count
+    positive_count = negative_count = 0
+    for _, (_, polarity) in _SENTIMENT_AUTOMATON.iter(text):
+        if polarity > 0:
+            positive_count += 1
+        else:
+            negative_count += 1
+    return positive_count, negative_count
+
 # 工具1: 计算器
 @fc_register('tool')
 def calculator(expression: str) -> str:
@@ -14,12 +105,10 @@ def calculator(expression: str) -> str:
         str: 计算结果
     """
     try:
-        allowed_chars = set('0123456789+-*/().() ')
-        if not all(c in allowed_chars for c in expression):
-            return "错误：表达式包含不允许的字符"
-        
-        result = eval(expression)
+        result = _evaluate(expression)
         return f"计算结果: {result}"
+    except UnsupportedExpression:
+        return "错误：表达式包含不允许的字符"
     except Exception as e:
         return f"计算错误: {str(e)}"
 
@@ -43,11 +132,7 @@ def text_analyzer(text: str, analysis_type: str = "word_count") -> str:
         char_count = len(text)
         return f"字符数量: {char_count}"
     elif analysis_type == "sentiment":
-        positive_words = ["好", "棒", "优秀", "喜欢", "开心", "快乐", "满意"]
-        negative_words = ["差", "坏", "糟糕", "讨厌", "难过", "失望", "不满"]
-        
-        positive_count = sum(1 for word in positive_words if word in text)
-        negative_count = sum(1 for word in negative_words if word in text)
+        positive_count, negative_count = _count_sentiment_words(text)
         
         if positive_count > negative_count:
             return "情感分析: 积极"
@@ -0,0 +1,140 @@
+from lazyllm.tools.rag.doc_node import DocNode
+from lazyllm.tools.rag.transform.parser import CaptionFootnoteParser
+from lazyllm.tools.rag.transform.parser.layout import LayoutNodeParser
+
+
+IMAGE = {'type': 'image', 'image_path': 'p.png'}
+TABLE = {'type': 'table'}
+EQUATION = {'type': 'equation'}
+TEXT = {'type': 'text'}
+
+
+def _nodes(spec):
+    return [DocNode(text=text, metadata=dict(metadata, index=i), global_metadata={'file_name': 'a.docx'})
+            for i, (text, metadata) in enumerate(spec)]
+
+
+class TestCaptionFootnoteParser:
+    def setup_method(self):
+        self.parser = CaptionFootnoteParser()
+
+    def _parse(self, spec, parser=None):
+        return [(n.text, n.metadata) for n in (parser or self.parser)._parse_nodes(_nodes(spec))]
+
+    def test_text_only(self):
+        assert self._parse([('a', TEXT), ('b', TEXT)]) == [
+            ('a', {'type': 'text', 'index': 0}), ('b', {'type': 'text', 'index': 1})]
+
+    def test_prev_caption(self):
+        assert self._parse([('图1 示意图', TEXT), ('', IMAGE), ('正文', TEXT)]) == [
+            ('![图1 示意图](p.png)', {'type': 'image', 'image_path': 'p.png', 'index': 0, 'image_caption': '图1 示意图'}),
+            ('正文', {'type': 'text', 'index': 1})]
+
+    def test_prev_caption_without_image(self):
+        parser = CaptionFootnoteParser(save_image=False)
+        assert self._parse([('图1 示意图', TEXT), ('', IMAGE), ('正文', TEXT)], parser) == [
+            ('图1 示意图', {'type': 'image', 'image_path': 'p.png', 'index': 0, 'image_caption': '图1 示意图'}),
+            ('正文', {'type': 'text', 'index': 1})]
+
+    def test_next_caption(self):
+        assert self._parse([('正文', TEXT), ('', IMAGE), ('Figure 2 overview', TEXT)]) == [
+            ('正文', {'type': 'text', 'index': 0}),
+            ('![Figure 2 overview](p.png)',
+             {'type': 'image', 'image_path': 'p.png', 'index': 1, 'image_caption': 'Figure 2 overview'})]
+
+    def test_prev_next_caption_choice(self):
+        assert self._parse([('figure 1 left', TEXT), ('', IMAGE), ('图1 right', TEXT)]) == [
+            ('![figure 1 left](p.png)',
+             {'type': 'image', 'image_path': 'p.png', 'index': 0, 'image_caption': 'figure 1 left'}),
+            ('图1 right', {'type': 'text', 'index': 1})]
+        assert self._parse([('图1 left', TEXT), ('', IMAGE), ('figure 1 right', TEXT)]) == [
+            ('图1 left', {'type': 'text', 'index': 0}),
+            ('![figure 1 right](p.png)',
+             {'type': 'image', 'image_path': 'p.png', 'index': 1, 'image_caption': 'figure 1 right'})]
+        assert self._parse([('图1 a', TEXT), ('', IMAGE), ('图2 b', TEXT)]) == [
+            ('![图1 a](p.png)', {'type': 'image', 'image_path': 'p.png', 'index': 0, 'image_caption': '图1 a'}),
+            ('图2 b', {'type': 'text', 'index': 1})]
+        assert self._parse([('表1 a', TEXT), ('|x|', TABLE), ('Table 2 b', TEXT)]) == [
+            ('表1 a\n|x|', {'type': 'table', 'index': 0, 'table_caption': '表1 a'}),
+            ('Table 2 b', {'type': 'text', 'index': 1})]
+
+    def test_mid_text_numbering(self):
+        assert self._parse([('岩石耐磨指数表 表11.2-3', TEXT), ('|a|b|', TABLE), ('正文', TEXT)]) == [
+            ('岩石耐磨指数表 表11.2-3\n|a|b|', {'type': 'table', 'index': 0, 'table_caption': '岩石耐磨指数表 表11.2-3'}),
+            ('正文', {'type': 'text', 'index': 1})]
+
+    def test_english_caption_case(self):
+        assert self._parse([('TABLE 9 参数', TEXT), ('|a|', TABLE)]) == [
+            ('TABLE 9 参数\n|a|', {'type': 'table', 'index': 0, 'table_caption': 'TABLE 9 参数'})]
+        assert self._parse([('Tab. 5 values', TEXT), ('|x|', TABLE)]) == [
+            ('Tab. 5 values\n|x|', {'type': 'table', 'index': 0, 'table_caption': 'Tab. 5 values'})]
+        assert self._parse([('fig. 4 plot', TEXT), ('', IMAGE)]) == [
+            ('![fig. 4 plot](p.png)',
+             {'type': 'image', 'image_path': 'p.png', 'index': 0, 'image_caption': 'fig. 4 plot'})]
+
+    def test_caption_and_footnote(self):
+        assert self._parse([('表2 参数', TEXT), ('|a|', TABLE), ('注：数据来源于试验', TEXT)]) == [
+            ('表2 参数\n|a|\n注：数据来源于试验',
+             {'type': 'table', 'index': 0, 'table_caption': '表2 参数',
+              'footnote': '注：数据来源于试验', 'table_footnote': '注：数据来源于试验'})]
+        assert self._parse([('公式3 欧拉', TEXT), ('e^{i\\pi}+1=0', EQUATION), ('Note: 近似', TEXT)]) == [
+            ('公式3 欧拉\ne^{i\\pi}+1=0\nNote: 近似',
+             {'type': 'equation', 'index': 0, 'equation_caption': '公式3 欧拉',
+              'footnote': 'Note: 近似', 'equation_footnote': 'Note: 近似'})]
+
+    def test_footnote_markers(self):
+        assert self._parse([('图 3 结构', TEXT), ('', IMAGE), ('* 仅供参考', TEXT)]) == [
+            ('![图 3 结构](p.png)\n* 仅供参考',
+             {'type': 'image', 'image_path': 'p.png', 'index': 0, 'image_caption': '图 3 结构',
+              'footnote': '* 仅供参考', 'image_footnote': '* 仅供参考'})]
+        for marker in ('① 单位为mm', '[1] 引自规范'):
+            assert self._parse([('|a|', TABLE), (marker, TEXT)]) == [
+                ('|a|\n' + marker, {'type': 'table', 'index': 0, 'footnote': marker, 'table_footnote': marker})]
+
+    def test_style_names(self):
+        footnote_style = dict(TEXT, style_dict={'style_name': 'Footnote Text'})
+        assert self._parse([('|a|', TABLE), ('普通说明文字', footnote_style)]) == [
+            ('|a|\n普通说明文字', {'type': 'table', 'index': 0, 'footnote': '普通说明文字', 'table_footnote': '普通说明文字'})]
+        caption_style = dict(TEXT, style_dict={'style_name': 'Caption'})
+        assert self._parse([('结构示意', caption_style), ('', IMAGE)]) == [
+            ('![结构示意](p.png)', {'type': 'image', 'image_path': 'p.png', 'index': 0, 'image_caption': '结构示意'})]
+        table_caption_style = dict(TEXT, style_dict={'style_name': 'Table Caption'})
+        assert self._parse([('结构示意', table_caption_style), ('', IMAGE)]) == [
+            ('结构示意', {'type': 'text', 'style_dict': {'style_name': 'Table Caption'}, 'index': 0}),
+            ('', {'type': 'image', 'image_path': 'p.png', 'index': 1})]
+
+    def test_plain_text_is_not_merged(self):
+        assert self._parse([('这是普通段落', TEXT), ('', IMAGE), ('另一段', TEXT)]) == [
+            ('这是普通段落', {'type': 'text', 'index': 0}),
+            ('', {'type': 'image', 'image_path': 'p.png', 'index': 1}),
+            ('另一段', {'type': 'text', 'index': 2})]
+
+    def test_caption_between_two_images(self):
+        assert self._parse([('', IMAGE), ('图1 中间', TEXT), ('', IMAGE)]) == [
+            ('![图1 中间](p.png)', {'type': 'image', 'image_path': 'p.png', 'index': 0, 'image_caption': '图1 中间'}),
+            ('', {'type': 'image', 'image_path': 'p.png', 'index': 1})]
+
+
+class TestLayoutNodeParser:
+    def setup_method(self):
+        self.parser = LayoutNodeParser()
+
+    def _levels(self, texts):
+        return [self.parser._calculate_level_by_regex(t) for t in texts]
+
+    def test_number_levels(self):
+        assert self._levels(['1. 总则', '1.1 范围', '1.1.1 细则', '1.1.1.1 更细', '12.3 abc', '１．２ 全角']) == [1, 2, 3, 4, 2, 2]
+        # 超过四级的编号按第四级处理；缺少点号、缺少内容或编号后紧跟括号的不视为标题
+        assert self._levels(['1.1.1.1.1 deep', '1.', '1.1)', '1 总则']) == [4, 0, 0, 0]
+
+    def test_letter_levels(self):
+        assert self._levels(['A.1 附录', 'B.1.2. x', 'a.1.1 sss']) == [2, 3, 3]
+
+    def test_chinese_levels(self):
+        assert self._levels(['第一章 总则', '第二节 xx', '第三条 yy', '第十篇 z']) == [1, 2, 3, 1]
+
+    def test_first_line_only(self):
+        assert self._levels(['  1.2 前导\n第二行', 'x\n1.1 y']) == [2, 0]
+
+    def test_no_level(self):
+        assert self._levels(['hello', '', '2020年1月2日']) == [0, 0, 0]